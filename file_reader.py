@@ -1,35 +1,53 @@
 import os
 import pandas as pd
 
-def read_any_file(path: str, sheet_name=0, sep=None) -> pd.DataFrame:
+# Separators tried for TXT exports, in order of preference
+SEPARATOR_GUESSES = ["\t", "|", ",", ";"]
+# How much of a file is read to detect the separator
+SNIFF_BYTES = 65536
+
+def sniff_separator(sample: str):
+   """
+   Picks the separator from the header line of a text sample.
+   Returns the first of SEPARATOR_GUESSES found in that line, or None.
+   """
+   header = next((line for line in sample.splitlines() if line.strip()), "")
+   for guess in SEPARATOR_GUESSES:
+       if guess in header:
+           return guess
+   return None
+
+def read_any_file(path: str, sheet_name=0, sep=None, dtype=None) -> pd.DataFrame:
    """
    Reads Excel, CSV, TXT into a pandas DataFrame.
    - Excel: .xlsx, .xls, .xlsm
    - CSV: .csv
    - TXT: .txt (auto sep if not provided)
+   dtype is passed through to pandas (e.g. {"Consignor": "string"}).
    """
    if not isinstance(path, str) or path.strip() == "":
        raise ValueError("File path is empty or invalid.")
    ext = os.path.splitext(path)[1].lower()
    # Excel
    if ext in [".xlsx", ".xls", ".xlsm"]:
-       return pd.read_excel(path, sheet_name=sheet_name)
+       return pd.read_excel(path, sheet_name=sheet_name, engine="calamine", dtype=dtype)
    # CSV
    if ext == ".csv":
-       return pd.read_csv(path)
+       return pd.read_csv(path, dtype=dtype)
    # TXT (tab, pipe, comma, etc.)
    if ext == ".txt":
        # If you know the separator, pass sep="|" or "\t" etc.
        if sep is not None:
-           return pd.read_csv(path, sep=sep)
-       # Try common separators automatically
-       for guess in ["\t", "|", ",", ";"]:
+           return pd.read_csv(path, sep=sep, dtype=dtype)
+       # Detect the separator from the header, then parse the file once
+       with open(path, "rb") as f:
+           head = f.read(SNIFF_BYTES).decode("utf-8", errors="replace")
+       guess = sniff_separator(head)
+       if guess is not None:
            try:
-               df = pd.read_csv(path, sep=guess)
-               if df.shape[1] > 1:
-                   return df
+               return pd.read_csv(path, sep=guess, engine="c", low_memory=False, dtype=dtype)
            except Exception:
                pass
        # Fallback: read as 1 column
-       return pd.read_csv(path, sep=None, engine="python")
+       return pd.read_csv(path, sep=None, engine="python", dtype=dtype)
    raise ValueError(f"Unsupported file type: {ext}")
\ No newline at end of file
@@ -8,6 +8,29 @@ Finds Cintas location codes by:
 import pandas as pd
 import re
 
+# Alphanumeric chunks, e.g. "0095", "11K", "CINTAS0095"
+_TOKEN_RE = re.compile(r"[A-Z0-9]+")
+# Digit/letter code shapes stuck to a word, e.g. the "0095" in "CINTAS0095"
+_EXTRA_RE = re.compile(r"\d{1,4}[A-Z]{0,2}|\d{1,4}")
+
+def combine_addr_vec(street, city, state):
+   """
+   Column-wise version of Location_Codes_Finder.combine_addr.
+   FIRST word of street + FIRST word of city + state
+   No spaces, uppercase
+   Rows missing any required part come back as NA.
+   """
+   street_str = street.fillna("").astype(str).str.strip()
+   city_str = city.fillna("").astype(str).str.strip()
+   state_str = state.fillna("").astype(str).str.strip()
+   missing = (street_str == "") | (city_str == "") | (state_str == "")
+   combined = (
+       street_str.str.split(n=1).str[0].fillna("").astype(str)
+       + city_str.str.split(n=1).str[0].fillna("").astype(str)
+       + state_str
+   )
+   return combined.str.replace(" ", "", regex=False).str.upper().mask(missing)
+
 class Location_Codes_Finder:
    def __init__(self, master_table, codes_list):
        self.master_table = master_table
@@ -31,15 +54,24 @@ class Location_Codes_Finder:
                fmt4_set.add(f)
        self.codes_set_raw = raw_set
        self.codes_set_4 = fmt4_set
+       # Can a token with no digits validate? Only if some code is zero padding + letters
+       # (e.g. 0ABC). When none is, text without a digit can never yield a code.
+       self.has_letter_only_codes = any(c.lstrip("0").isalpha() for c in fmt4_set)
        # Build master lookup: combined_address -> LocationCode
-       master_keys = master_table.apply(
-           lambda r: self.combine_addr(r.get("Loc_Address", ""), r.get("Loc_City", ""), r.get("Loc_ST", "")),
-           axis=1,
-       )
-       master_codes = master_table.get("Loc Code", pd.Series([""] * len(master_table))).astype(str).str.strip().str.upper()
-       self.address_to_code = dict(
-           (k, c) for k, c in zip(master_keys, master_codes) if k not in [None, ""]
+       blank = pd.Series("", index=master_table.index)
+       master_keys = combine_addr_vec(
+           master_table.get("Loc_Address", blank),
+           master_table.get("Loc_City", blank),
+           master_table.get("Loc_ST", blank),
        )
+       master_codes = master_table.get("Loc Code", blank).astype(str).str.strip().str.upper()
+       has_key = master_keys.notna()
+       address_codes = pd.Series(master_codes[has_key].to_numpy(), index=master_keys[has_key].to_numpy())
+       # Later rows win on duplicate addresses (same as building a dict)
+       self.address_codes = address_codes[~address_codes.index.duplicated(keep="last")]
+       self.address_to_code = self.address_codes.to_dict()
+       # Distinct combined master addresses, for membership checks (Index keeps its hashtable)
+       self.master_keys = self.address_codes.index
    def format_code_4(self, code):
        """
        Forces any code into a 4-character standardized code.
@@ -59,6 +91,15 @@ class Location_Codes_Finder:
            return s.zfill(4)[-4:]
        # Otherwise pad left to 4 (e.g., 11K -> 011K, T60 -> 0T60)
        return s.zfill(4)
+   def format_code_4_series(self, codes):
+       """
+       Column-wise format_code_4.
+       Blank/missing values come back as NA.
+       """
+       s = codes.fillna("").astype(str).str.strip().str.upper()
+       padded = s.str.zfill(4)
+       formatted = padded.mask(s.str.isdigit(), padded.str[-4:])
+       return formatted.mask(s == "")
    def validate_code_in_list(self, code):
        """
        Accepts ANY incoming representation:
@@ -79,6 +120,13 @@ class Location_Codes_Finder:
            # Return the standardized version anyway for consistency downstream
            return self.format_code_4(raw)
        return None
+   def validate_codes_series(self, codes):
+       """
+       Column-wise validate_code_in_list.
+       Returns standardized 4-char codes where allowed, NA elsewhere.
+       """
+       formatted = self.format_code_4_series(codes)
+       return formatted.where(formatted.isin(self.codes_set_4))
    def extract_from_text(self, consignor_consignee):
        """
        Robust extraction:
@@ -91,10 +139,10 @@ class Location_Codes_Finder:
        text = str(consignor_consignee).upper()
        # Grab tokens like:
        #   "0095", "095", "95", "11K", "0K35", also catches "CINTAS0095"
-       tokens = re.findall(r"[A-Z0-9]+", text)
+       tokens = _TOKEN_RE.findall(text)
        # Also try splitting patterns where code is stuck to a word, e.g. "CINTAS0095"
        # We'll scan substrings that look like digit/letter code shapes.
-       extra = re.findall(r"\d{1,4}[A-Z]{0,2}|\d{1,4}", text)
+       extra = _EXTRA_RE.findall(text)
        tokens.extend(extra)
        # Prefer longer tokens first (so 0095 wins over 95, 011K over 11K)
        tokens = sorted(set(tokens), key=len, reverse=True)
@@ -103,6 +151,33 @@ class Location_Codes_Finder:
            if v:
                return v
        return None
+   def extract_from_text_series(self, texts):
+       """
+       Column-wise extract_from_text.
+       - Each distinct text is tokenized once (same patterns as extract_from_text).
+       - Each distinct token is validated once, in one vectorized pass.
+       - Per text, the longest valid token wins (first one on ties).
+       """
+       row_ids, uniques = pd.factorize(texts.fillna("").astype(str).str.upper())
+       text = pd.Series(uniques, dtype=object)
+       candidates = text
+       if not self.has_letter_only_codes:
+           # Cheap C-level skip of names that cannot contain a code
+           candidates = text[text.str.contains(r"[0-9]", regex=True).to_numpy(dtype=bool)]
+       tokens = pd.concat([
+           candidates.str.findall(_TOKEN_RE),
+           candidates.str.findall(_EXTRA_RE),
+       ]).explode().dropna()
+       # Token vocabulary is small (names repeat), so validate each distinct token once
+       token_ids, distinct = pd.factorize(tokens)
+       codes = pd.Series(
+           self.validate_codes_series(pd.Series(distinct, dtype=object)).to_numpy()[token_ids],
+           index=tokens.index,
+       )
+       found = pd.DataFrame({"code": codes, "len": tokens.str.len()})[codes.notna()]
+       found = found.sort_values("len", ascending=False, kind="stable")
+       best = found.loc[~found.index.duplicated(), "code"].reindex(text.index)
+       return pd.Series(best.to_numpy()[row_ids], index=texts.index)
    def combine_addr(self, street, city, state):
        """
        FIRST word of street + FIRST word of city + state
@@ -141,4 +216,13 @@ class Location_Codes_Finder:
        if key == "":
            return None
        raw_code = self.address_to_code.get(key, None)
-       return self.format_code_4(raw_code)
\ No newline at end of file
+       return self.format_code_4(raw_code)
+   def extract_from_address_series(self, combined_addresses):
+       """
+       Column-wise extract_from_address.
+       Addresses repeat across shipments, so each distinct address is looked up once.
+       """
+       row_ids, uniques = pd.factorize(combined_addresses.fillna("").astype(str))
+       keys = pd.Series(uniques, dtype=object).str.replace(" ", "", regex=False).str.upper().str.strip()
+       codes = self.format_code_4_series(keys.map(self.address_codes)).to_numpy()
+       return pd.Series(codes[row_ids], index=combined_addresses.index)
@@ -1,73 +1,155 @@
+import hashlib
+import os
+import pickle
+import re
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
-from location_codes_finder import Location_Codes_Finder
+from location_codes_finder import Location_Codes_Finder, combine_addr_vec
 from matrix_mapping import MatrixMapper
 from file_reader import read_any_file
 
+_BLANK_RE = re.compile(r"^\s*$")
+_CINTAS_RE = re.compile(r"\b(?:CINTAS|MAT)\b")
 
-accrual_sheet = read_any_file(r"C:\Users\c1354623\OneDrive - Cintas Corporation\Documents\Miscellaneous_Excel_Analysis\New Accrual Logic III\SAP_Weekly_Audit_Detail_01162026.txt")     # or .csv or .txt
+# Text columns read as Arrow-backed strings so .str ops run on Arrow kernels
+TEXT_COLUMNS = {
+   "Consignor": "string[pyarrow]",
+   "Consignee": "string[pyarrow]",
+   "Origin Addresss": "string[pyarrow]",
+   "Origin City": "string[pyarrow]",
+   "Origin State Code": "string[pyarrow]",
+   "Dest Address1": "string[pyarrow]",
+   "Dest City": "string[pyarrow]",
+   "Dest State Code": "string[pyarrow]",
+   "Org Type Code": "string[pyarrow]",
+   "Dest Type Code": "string[pyarrow]",
+}
+
+CACHE_DIR = ".cache"
+# Bump when Location_Codes_Finder gains/changes attributes so stale pickles are not reused
+FINDER_CACHE_VERSION = "3"
+
+
+def load_location_finder(master_path, codes_path, master_table):
+   """Load a pickled Location_Codes_Finder keyed by the reference files' mtimes, or build and cache one."""
+   try:
+      key = hashlib.sha1(str(os.path.getmtime(master_path)).encode() + str(os.path.getmtime(codes_path)).encode()).hexdigest()
+      cache_path = os.path.join(CACHE_DIR, f"locfinder_v{FINDER_CACHE_VERSION}_{key}.pkl")
+   except OSError:
+      cache_path = None
+
+   if cache_path and os.path.exists(cache_path):
+      try:
+         with open(cache_path, "rb") as f:
+            return pickle.load(f)
+      except Exception:
+         pass  # corrupt or stale cache: rebuild below
+
+   codes = pd.read_excel(codes_path, engine="calamine", usecols=["Codes"])
+   finder = Location_Codes_Finder(master_table=master_table, codes_list=codes["Codes"])
+
+   if cache_path:
+      try:
+         os.makedirs(CACHE_DIR, exist_ok=True)
+         with open(cache_path, "wb") as f:
+            pickle.dump(finder, f, protocol=5)
+      except OSError:
+         pass
+   return finder
+
+
+accrual_path = r"C:\Users\c1354623\OneDrive - Cintas Corporation\Documents\Miscellaneous_Excel_Analysis\New Accrual Logic III\SAP_Weekly_Audit_Detail_01162026.txt"     # or .csv or .txt
 
 
 # References
-cintas_master_data = pd.read_excel(r"C:\Users\c1354623\OneDrive - Cintas Corporation\Documents\Miscellaneous_Excel_Analysis\New Accrual Logic III\MY LOCATION TABLE (4).xlsx")
-cintas_master_data_2 = pd.read_excel(r"C:\Users\c1354623\OneDrive - Cintas Corporation\Documents\Miscellaneous_Excel_Analysis\New Accrual Logic III\Master Location Table.xlsx")
-cintas_location_codes = pd.read_excel(r"C:\Users\c1354623\OneDrive - Cintas Corporation\Documents\Miscellaneous_Excel_Analysis\New Accrual Logic III\all_location_codes.xlsx")
+master_path = r"C:\Users\c1354623\OneDrive - Cintas Corporation\Documents\Miscellaneous_Excel_Analysis\New Accrual Logic III\MY LOCATION TABLE (4).xlsx"
+master_2_path = r"C:\Users\c1354623\OneDrive - Cintas Corporation\Documents\Miscellaneous_Excel_Analysis\New Accrual Logic III\Master Location Table.xlsx"
+codes_path = r"C:\Users\c1354623\OneDrive - Cintas Corporation\Documents\Miscellaneous_Excel_Analysis\New Accrual Logic III\all_location_codes.xlsx"
+
+# Output
+output_file = "Weekly Batch 463.xlsx"
+# Also write a Parquet copy next to the workbook: much faster to write/read and keeps dtypes, for downstream tooling
+WRITE_PARQUET = False
+
+# The input files are independent, so read them concurrently (the codes list is
+# only read by load_location_finder when there is no cached finder)
+with ThreadPoolExecutor(max_workers=3) as executor:
+   accrual_future = executor.submit(read_any_file, accrual_path, dtype=TEXT_COLUMNS)
+   master_future = executor.submit(pd.read_excel, master_path, engine="calamine", usecols=["Loc Code", "Loc_Address", "Loc_City", "Loc_ST"])
+   master_2_future = executor.submit(pd.read_excel, master_2_path, engine="calamine", usecols=["Loc Code", "Type Code", "ProfitCtr", "Cost Center"])
+   accrual_sheet = accrual_future.result()
+   cintas_master_data = master_future.result()
+   cintas_master_data_2 = master_2_future.result()
 cintas_coding_matrix = ""
 
-location_finder = Location_Codes_Finder(master_table=cintas_master_data, codes_list=cintas_location_codes["Codes"])
+master_text_cols = ["Loc_Address", "Loc_City", "Loc_ST"]
+cintas_master_data[master_text_cols] = cintas_master_data[master_text_cols].astype("string[pyarrow]")
+
+location_finder = load_location_finder(master_path, codes_path, cintas_master_data)
 
 ### we are going to combine addresses first before getting any location code
-master_combined_set = set(cintas_master_data.apply(lambda r: location_finder.combine_addr(r["Loc_Address"], r["Loc_City"], r["Loc_ST"]), axis=1).dropna())
-accrual_sheet["Consignor_Combined_Address"] = accrual_sheet.apply(lambda r: location_finder.combine_addr(r["Origin Addresss"], r["Origin City"], r["Origin State Code"]), axis=1)
-accrual_sheet["Consignee_Combined_Address"] = accrual_sheet.apply(lambda r: location_finder.combine_addr(r["Dest Address1"], r["Dest City"], r["Dest State Code"]), axis=1)
-
-# Location_Code_Extractor()
-"""The function of the Location Code Extractor is to extract any location codes that it finds in Consignor and Consignee Columns"""
-### this returns a location code
-accrual_sheet['Extracted Consignor Code'] = accrual_sheet["Consignor"].apply(location_finder.extract_from_text)
-accrual_sheet['Extracted Consignee Code'] = accrual_sheet["Consignee"].apply(location_finder.extract_from_text)
-
-# Address_Checker()
-"""The function of the Address Checker is ONLY to check if an address in the Accrual or Weekly Audit Sheet exists in the Cintas Master Data. It should be a YES/NO, or EXISTS/DOESN'T EXIST
-So this address checker will apply only to rows where Re-Coded Consignor and Re-Coded Consignee is NOT BLANK
-"""
-### this returns a yes or no and is used under Location_Code_Extractor
-consignor_has_code = (
-   accrual_sheet["Extracted Consignor Code"].notna() &
-   (accrual_sheet["Extracted Consignor Code"].astype(str).str.strip() != "")
-)
-consignee_has_code = (
-   accrual_sheet["Extracted Consignee Code"].notna() &
-   (accrual_sheet["Extracted Consignee Code"].astype(str).str.strip() != "")
-)
-# 2) Build masks: name does NOT mention CINTAS or MAT
-consignor_no_cintas_or_mat = ~accrual_sheet["Consignor"].fillna("").str.upper().str.contains(r"\b(CINTAS|MAT)\b", regex=True)
-consignee_no_cintas_or_mat = ~accrual_sheet["Consignee"].fillna("").str.upper().str.contains(r"\b(CINTAS|MAT)\b", regex=True)
-# 3) Build masks: combined address exists in master
-consignor_addr_ok = accrual_sheet["Consignor_Combined_Address"].fillna("").isin(master_combined_set)
-consignee_addr_ok = accrual_sheet["Consignee_Combined_Address"].fillna("").isin(master_combined_set)
-# 4) Wipe codes ONLY when:
-#    code exists + not cintas/mat + address NOT in master
-wipe_consignor = consignor_has_code & consignor_no_cintas_or_mat & ~consignor_addr_ok
-wipe_consignee = consignee_has_code & consignee_no_cintas_or_mat & ~consignee_addr_ok
-accrual_sheet.loc[wipe_consignor, "Extracted Consignor Code"] = ""
-accrual_sheet.loc[wipe_consignee, "Extracted Consignee Code"] = ""
-
-
-# Location_Code_Based_On_OrgType/DestType_Finder()
-# """The function of the Location_Code_Based_On_OrgType/DestType_Finder() is to find a location code based on the Org Type Code and Dest Type Code Colunms"""
-accrual_sheet[["Org Type Consignor Code", "Dest Type Consignee Code"]] = accrual_sheet.apply(lambda r: pd.Series(location_finder.extract_from_org_dest_type(r["Org Type Code"], r["Dest Type Code"])), axis=1)
-
-
-# Location_Code_Based_On_Address_Finder()
-"""The function of the Location_Code_Based_On_Address_Finder is to find a location code based on the address in the accrual or weekly audit sheet that it finds in the cintas master data"""
-### this returns a location code. Thus, this and location code extractor should probably be under one class called "Location_Code_Finder"
-accrual_sheet["Addr_Lookup_Consignor_Code"] = accrual_sheet["Consignor_Combined_Address"].apply(
-   location_finder.extract_from_address
-)
+# The finder already holds the distinct master address keys as a pandas Index
+master_combined_set = location_finder.master_keys
 
-accrual_sheet["Addr_Lookup_Consignee_Code"] = accrual_sheet["Consignee_Combined_Address"].apply(
-   location_finder.extract_from_address
-)
+
+def process_side(name, street, city, state, type_code):
+   """Runs the code extraction, address check, type-code and address lookups for one side (consignor or consignee)."""
+   combined = combine_addr_vec(street, city, state)
+
+   # Location_Code_Extractor()
+   """The function of the Location Code Extractor is to extract any location codes that it finds in Consignor and Consignee Columns"""
+   ### this returns a location code
+   # Uppercased names are built once and reused for extraction and the CINTAS/MAT mask
+   upper_name = name.fillna("").str.upper()
+   extracted = location_finder.extract_from_text_series(upper_name)
+
+   # Address_Checker()
+   """The function of the Address Checker is ONLY to check if an address in the Accrual or Weekly Audit Sheet exists in the Cintas Master Data. It should be a YES/NO, or EXISTS/DOESN'T EXIST
+   So this address checker will apply only to rows where Re-Coded Consignor and Re-Coded Consignee is NOT BLANK
+   """
+   ### this returns a yes or no and is used under Location_Code_Extractor
+   # 1) Build masks: an extracted code exists (extracted codes are already stripped)
+   has_code = extracted.fillna("").to_numpy() != ""
+   # 2) Build masks: name mentions CINTAS or MAT
+   has_cintas_or_mat = upper_name.str.contains(_CINTAS_RE).to_numpy(dtype=bool)
+   # 3) Build masks: combined address exists in master
+   addr_ok = combined.fillna("").isin(master_combined_set).to_numpy(dtype=bool)
+   # 4) Wipe codes ONLY when:
+   #    code exists + not cintas/mat + address NOT in master
+   wipe = has_code & ~has_cintas_or_mat & ~addr_ok
+   extracted = extracted.mask(wipe, "")
+
+   # Location_Code_Based_On_OrgType/DestType_Finder()
+   # """The function of the Location_Code_Based_On_OrgType/DestType_Finder() is to find a location code based on the Org Type Code and Dest Type Code Colunms"""
+   type_lookup = location_finder.validate_codes_series(type_code)
+
+   # Location_Code_Based_On_Address_Finder()
+   """The function of the Location_Code_Based_On_Address_Finder is to find a location code based on the address in the accrual or weekly audit sheet that it finds in the cintas master data"""
+   ### this returns a location code. Thus, this and location code extractor should probably be under one class called "Location_Code_Finder"
+   addr_lookup = location_finder.extract_from_address_series(combined)
+
+   return combined, extracted, type_lookup, addr_lookup
+
+
+# Consignor and consignee are independent; the pandas/Arrow string kernels release the GIL,
+# so the two sides run in parallel threads. Each thread gets its own column copies.
+org_cols = ["Consignor", "Origin Addresss", "Origin City", "Origin State Code", "Org Type Code"]
+dest_cols = ["Consignee", "Dest Address1", "Dest City", "Dest State Code", "Dest Type Code"]
+with ThreadPoolExecutor(max_workers=2) as executor:
+   consignor_result, consignee_result = executor.map(
+      lambda cols: process_side(*(accrual_sheet[c].copy() for c in cols)),
+      [org_cols, dest_cols],
+   )
+
+# Columns are added in the same order as the serial version
+accrual_sheet["Consignor_Combined_Address"] = consignor_result[0]
+accrual_sheet["Consignee_Combined_Address"] = consignee_result[0]
+accrual_sheet["Extracted Consignor Code"] = consignor_result[1]
+accrual_sheet["Extracted Consignee Code"] = consignee_result[1]
+accrual_sheet["Org Type Consignor Code"] = consignor_result[2]
+accrual_sheet["Dest Type Consignee Code"] = consignee_result[2]
+accrual_sheet["Addr_Lookup_Consignor_Code"] = consignor_result[3]
+accrual_sheet["Addr_Lookup_Consignee_Code"] = consignee_result[3]
 
 # Final Location Code
 """
@@ -77,46 +159,39 @@ if it's not and address-based is filled, then use address, based, if none of the
 """
 import numpy as np
 def clean_blank(s):
-   return s.replace(r"^\s*$", pd.NA, regex=True)
+   return s.replace(_BLANK_RE, pd.NA, regex=True)
+# First non-blank code across the priority columns, left to right
+cols_org = ["Extracted Consignor Code", "Org Type Consignor Code", "Addr_Lookup_Consignor_Code"]
+cols_dest = ["Extracted Consignee Code", "Dest Type Consignee Code", "Addr_Lookup_Consignee_Code"]
 accrual_sheet["Final Consignor Code"] = (
-   clean_blank(accrual_sheet["Extracted Consignor Code"])
-   .fillna(clean_blank(accrual_sheet["Org Type Consignor Code"]))
-   .fillna(clean_blank(accrual_sheet["Addr_Lookup_Consignor_Code"]))
-   .fillna("NON-CINTAS")
+   clean_blank(accrual_sheet[cols_org].astype("string")).bfill(axis=1).iloc[:, 0].fillna("NON-CINTAS")
 )
 accrual_sheet["Final Consignee Code"] = (
-   clean_blank(accrual_sheet["Extracted Consignee Code"])
-   .fillna(clean_blank(accrual_sheet["Dest Type Consignee Code"]))
-   .fillna(clean_blank(accrual_sheet["Addr_Lookup_Consignee_Code"]))
-   .fillna("NON-CINTAS")
+   clean_blank(accrual_sheet[cols_dest].astype("string")).bfill(axis=1).iloc[:, 0].fillna("NON-CINTAS")
 )
 
 # Type_Code_Finder()
 """The function of the Type_Code_Finder is ONLY to find the type code of each value in the Re-coded Consignor and Consignee Code Columns"""
 ### this returns a type code
-master_code_to_type = dict(
-   zip(
-       cintas_master_data_2["Loc Code"].astype(str).str.upper(),
-       cintas_master_data_2["Type Code"]
-           .astype(str)
-           .str.upper()
-           .replace("NAN", pd.NA)   # fixes string "nan" cases
-   )
+# Loc Code -> Type Code as a Series so .map does a hash lookup; last duplicate wins like dict(zip(...))
+type_map = pd.Series(
+   cintas_master_data_2["Type Code"]
+       .astype(str)
+       .str.upper()
+       .replace("NAN", pd.NA)   # fixes string "nan" cases
+       .to_numpy(),
+   index=cintas_master_data_2["Loc Code"].astype(str).str.upper(),
 )
+type_map = type_map[~type_map.index.duplicated(keep="last")]
 
-accrual_sheet["Final Consignor Type"] = accrual_sheet["Final Consignor Code"].map(master_code_to_type)
-accrual_sheet["Final Consignee Type"] = accrual_sheet["Final Consignee Code"].map(master_code_to_type)
-accrual_sheet["Final Consignor Type"] = accrual_sheet["Final Consignor Type"].fillna("NON-CINTAS")
-accrual_sheet["Final Consignee Type"] = accrual_sheet["Final Consignee Type"].fillna("NON-CINTAS")
+accrual_sheet["Final Consignor Type"] = accrual_sheet["Final Consignor Code"].map(type_map).fillna("NON-CINTAS")
+accrual_sheet["Final Consignee Type"] = accrual_sheet["Final Consignee Code"].map(type_map).fillna("NON-CINTAS")
 
 # Responsible_Party_Decider()
 """The function of the Responsible Party Decider is to find the responsible party of each re-coded Consignor and Consignee pair based on the type codes and the coding matrix"""
 ### this returns a location code, but that location code is a responsible party, so should probably be under its own class
 mapper = MatrixMapper()
-accrual_sheet["Responsible Party"] = accrual_sheet.apply(
-   mapper.determine_profit_center,
-   axis=1
-)
+accrual_sheet["Responsible Party"] = mapper.determine_profit_centers(accrual_sheet)
 
 # Profit_Center_Populator()
 """The function of the Profit_Center_Populator is ONLY to populate the responsible party in the Profit_Center_Populator column"""
@@ -147,16 +222,9 @@ accrual_sheet["Cost Center EJ"] = accrual_sheet["Cost Center EJ"].fillna("").ast
 
 # GL_Code_Populator()
 """The function of the GL_Code_Populator is ONLY to populate the responsible party in the GL_Code_Populator column"""
-accrual_sheet["Account # EJ"] = accrual_sheet.apply(
-   lambda row: 621000
-   if "G59" in str(row.get("Profit Center EJ", ""))
-   else (
-         621000
-         if row.get("Final Consignee Code") == row.get("Responsible Party")
-         else 621020
-   ),
-   axis=1,
-)
+is_g59 = accrual_sheet["Profit Center EJ"].astype(str).str.contains("G59", regex=False).to_numpy(dtype=bool)
+consignee_is_responsible = accrual_sheet["Final Consignee Code"].to_numpy() == accrual_sheet["Responsible Party"].to_numpy()
+accrual_sheet["Account # EJ"] = np.select([is_g59, consignee_is_responsible], [621000, 621000], default=621020)
 
 # Automation Accuracy
 if {"Profit Center", "Profit Center EJ"}.issubset(accrual_sheet.columns):
@@ -189,7 +257,11 @@ accrual_sheet = accrual_sheet[first_cols + other_cols]
 
 
 # Output
-output_file = "Weekly Batch 463.xlsx"
-accrual_sheet.to_excel(output_file, index=False)
+# xlsxwriter streams to disk far faster than openpyxl. constant_memory is left off because
+# pandas writes cells column by column and that mode only accepts row-by-row writes.
+with pd.ExcelWriter(output_file, engine="xlsxwriter") as writer:
+   accrual_sheet.to_excel(writer, index=False)
+if WRITE_PARQUET:
+   accrual_sheet.to_parquet(output_file.replace(".xlsx", ".parquet"), index=False)
 
 
@@ -5,11 +5,30 @@ import re
 from io import BytesIO, StringIO
 from typing import Optional
 
+import numpy as np
 import pandas as pd
 
-from location_codes_finder import Location_Codes_Finder
+from file_reader import SNIFF_BYTES, sniff_separator
+from location_codes_finder import Location_Codes_Finder, combine_addr_vec
 from matrix_mapping import MatrixMapper
 
+_CINTAS_RE = re.compile(r"\b(?:CINTAS|MAT)\b")
+
+TEXT_DTYPE = "string[pyarrow]"
+
+# Mississauga "Suite" consignee rule: consignor name prefix -> consignee code
+MISSISSAUGA_SUITE_RULES = {
+    "097H": ("LNK", "AMERICAN METAL CRAFTERS", "RADIANS", "EVER READY"),
+    "067N": ("VECTAIR", "ZEP"),
+    "0897": ("CHEMFREE", "BERRY GLOBAL"),
+}
+_MISSISSAUGA_PREFIX_TO_CODE = {
+    prefix: code for code, prefixes in MISSISSAUGA_SUITE_RULES.items() for prefix in prefixes
+}
+_MISSISSAUGA_PREFIX_RE = re.compile(
+    "^(" + "|".join(map(re.escape, _MISSISSAUGA_PREFIX_TO_CODE)) + ")"
+)
+
 
 # =========================
 # File Reader (upload-safe)
@@ -20,7 +39,7 @@ def read_uploaded_to_df(uploaded_file) -> pd.DataFrame:
 
     # Excel
     if name.endswith((".xlsx", ".xls", ".xlsm")):
-        return pd.read_excel(BytesIO(raw_bytes))
+        return pd.read_excel(BytesIO(raw_bytes), engine="calamine")
 
     # CSV
     if name.endswith(".csv"):
@@ -35,7 +54,7 @@ def read_uploaded_to_df(uploaded_file) -> pd.DataFrame:
             try:
                 text = raw_bytes.decode("utf-16")
             except Exception:
-                cleaned = raw_bytes.replace(b"\x00", b"")
+                cleaned = raw_bytes.translate(None, b"\x00")
                 try:
                     text = cleaned.decode("utf-8")
                 except Exception:
@@ -48,15 +67,13 @@ def read_uploaded_to_df(uploaded_file) -> pd.DataFrame:
 
         sio = StringIO(text)
 
-        # Try common separators
-        for sep in ["\t", "|", ",", ";"]:
-            sio.seek(0)
+        # Detect the separator from the header, then parse once
+        sep = sniff_separator(text[:SNIFF_BYTES])
+        if sep is not None:
             try:
-                df = pd.read_csv(sio, sep=sep, engine="python")
-                if df.shape[1] > 1:
-                    return df
+                return pd.read_csv(sio, sep=sep, engine="python")
             except Exception:
-                continue
+                pass
 
         # Last resort: auto-detect
         sio.seek(0)
@@ -89,7 +106,7 @@ def standardize_input_columns(df: pd.DataFrame) -> pd.DataFrame:
       - Origin Address, Origin City, Origin State
       - Destination Address, Destination City, Destination State
     """
-    df = df.copy()
+    df = df.copy(deep=False)  # new frame; columns are only replaced, never written in place
 
     FIELD_ALIASES = {
         # Names
@@ -132,7 +149,8 @@ def standardize_input_columns(df: pd.DataFrame) -> pd.DataFrame:
         "Origin Address", "Origin City", "Origin State",
         "Destination Address", "Destination City", "Destination State",
     ]:
-        df[c] = df[c].fillna("").astype(str)
+        # Arrow-backed strings: the pipeline's .str calls run as Arrow compute kernels
+        df[c] = df[c].fillna("").astype(TEXT_DTYPE)
 
     return df
 
@@ -140,27 +158,27 @@ def standardize_input_columns(df: pd.DataFrame) -> pd.DataFrame:
 # =========================
 # Utilities
 # =========================
-def clean_blank(s: pd.Series) -> pd.Series:
-    return s.replace(r"^\s*$", pd.NA, regex=True)
-
-
-def _normalize_loc_code(v) -> str:
+def _first_nonblank_code(df: pd.DataFrame, cols: list[str], default: str = "NON-CINTAS") -> np.ndarray:
     """
-    Normalizes location codes so '972' becomes '0972' (pads purely numeric codes to 4 chars).
-    Keeps alphanumerics as-is (uppercased, stripped).
+    Row-wise first non-blank value across cols (in priority order), else default.
+    Whitespace-only strings count as blank.
     """
-    if v is None:
-        return ""
-    s = str(v).strip().upper()
-    if not s:
-        return ""
-    if re.fullmatch(r"\d+", s):
-        return s.zfill(4)
-    return s
+    out = np.full(len(df), default, dtype=object)
+    for col in reversed(cols):
+        values = df[col].to_numpy(dtype=object)
+        blank = df[col].fillna("").astype(str).str.strip().eq("").to_numpy(dtype=bool)
+        out = np.where(blank, out, values)
+    return out
 
 
 def _normalize_loc_code_series(s: pd.Series) -> pd.Series:
-    return s.fillna("").astype(str).map(_normalize_loc_code)
+    """
+    Normalizes location codes so '972' becomes '0972' (pads purely numeric codes to 4 chars).
+    Keeps alphanumerics as-is (uppercased, stripped); blanks become ''.
+    """
+    s = s.fillna("").astype(str).str.strip().str.upper()
+    is_num = s.str.fullmatch(r"\d+").to_numpy(dtype=bool)
+    return s.mask(is_num, s.str.zfill(4))
 
 
 def _as_text_keep_zeros(series: pd.Series, decimals: int = 5) -> pd.Series:
@@ -170,65 +188,81 @@ def _as_text_keep_zeros(series: pd.Series, decimals: int = 5) -> pd.Series:
     """
     s = series.fillna("").astype(str).str.strip()
 
-    def fmt(v: str) -> str:
-        if not v:
-            return ""
-        # Already has non-numeric chars -> keep as-is
-        if not re.fullmatch(r"-?\d+(\.\d+)?", v):
-            return v
-        # Format number with fixed decimals
-        try:
-            num = float(v)
-        except Exception:
-            return v
-        return f"{num:.{decimals}f}"
-
-    return s.map(fmt)
+    # Only plain numbers are reformatted; anything else is kept as-is
+    is_num = s.str.fullmatch(r"-?\d+(\.\d+)?").to_numpy(dtype=bool)
+    if not is_num.any():
+        return s
+    out = s.copy()
+    out[is_num] = s[is_num].astype(float).map(f"{{:.{decimals}f}}".format)
+    return out
 
 
 def _force_excel_text(series: pd.Series) -> pd.Series:
     """
-    Prefix numeric-looking strings with an apostrophe so Excel keeps them as TEXT.
-    Apostrophe is not displayed in Excel cells.
+    Stripped text ('' for blanks) so numeric-looking codes are written to Excel as TEXT.
     """
-    s = series.fillna("").astype(str).str.strip()
-
-    def fix(v: str) -> str:
-        if not v:
-            return ""
-        if re.fullmatch(r"-?\d+(\.\d+)?", v):
-            return v
-        return v
-
-    return s.map(fix)
+    return series.fillna("").astype(str).str.strip()
 
 
 # =========================
 # Main Pipeline
 # =========================
+def _codes_column(all_codes: pd.DataFrame) -> str:
+    return "Codes" if "Codes" in all_codes.columns else all_codes.columns[0]
+
+
+def normalize_refs(refs: dict[str, pd.DataFrame]) -> dict[str, pd.DataFrame]:
+    """
+    Defensive normalization of reference tables (fixes Google Sheets numeric coercion).
+    Returns copies with "Loc Code" / codes normalized; pass the result to
+    run_pipeline(..., refs_normalized=True) to skip doing it again on every run.
+    """
+    my_loc = refs["my_location"]
+    master_loc = refs["master_location"]
+    all_codes = refs["all_codes"]
+
+    # assign() returns new frames that share the untouched columns with the inputs
+    my_loc_cols = {
+        col: my_loc[col].astype(TEXT_DTYPE) for col in ("Loc_Address", "Loc_City", "Loc_ST") if col in my_loc.columns
+    }
+    if "Loc Code" in my_loc.columns:
+        my_loc_cols["Loc Code"] = _normalize_loc_code_series(my_loc["Loc Code"]).astype(TEXT_DTYPE)
+    my_loc = my_loc.assign(**my_loc_cols)
+    if "Loc Code" in master_loc.columns:
+        master_loc = master_loc.assign(**{"Loc Code": _normalize_loc_code_series(master_loc["Loc Code"]).astype(TEXT_DTYPE)})
+
+    # Normalize all_codes list
+    codes_col = _codes_column(all_codes)
+    all_codes = all_codes.assign(**{codes_col: _normalize_loc_code_series(all_codes[codes_col])})
+
+    return {**refs, "my_location": my_loc, "master_location": master_loc, "all_codes": all_codes}
+
+
 def run_pipeline(
     accrual_sheet: pd.DataFrame,
     cintas_master_data: pd.DataFrame,       # MY LOCATION TABLE (4)
     cintas_master_data_2: pd.DataFrame,     # Master Location Table
     cintas_location_codes: pd.DataFrame,    # all_location_codes
+    refs_normalized: bool = False,          # refs already went through normalize_refs
+    copy_inputs: bool = False,              # deep-copy the accrual sheet first
 ) -> pd.DataFrame:
-    accrual_sheet = accrual_sheet.copy()
+    # standardize_input_columns returns a new frame, so the caller's sheet never gains
+    # pipeline columns; a deep copy is only needed if the caller asks for one
+    if copy_inputs:
+        accrual_sheet = accrual_sheet.copy()
     accrual_sheet = standardize_input_columns(accrual_sheet)
 
-    # --- Defensive normalization of reference tables (fixes Google Sheets numeric coercion)
-    my_loc = cintas_master_data.copy()
-    master_loc = cintas_master_data_2.copy()
-    all_codes = cintas_location_codes.copy()
-
-    # Normalize Loc Code columns
-    if "Loc Code" in my_loc.columns:
-        my_loc["Loc Code"] = _normalize_loc_code_series(my_loc["Loc Code"])
-    if "Loc Code" in master_loc.columns:
-        master_loc["Loc Code"] = _normalize_loc_code_series(master_loc["Loc Code"])
-
-    # Normalize all_codes list
-    codes_col = "Codes" if "Codes" in all_codes.columns else all_codes.columns[0]
-    all_codes[codes_col] = _normalize_loc_code_series(all_codes[codes_col])
+    refs = {
+        "my_location": cintas_master_data,
+        "master_location": cintas_master_data_2,
+        "all_codes": cintas_location_codes,
+    }
+    if not refs_normalized:
+        refs = normalize_refs(refs)
+    my_loc = refs["my_location"]
+    master_loc = refs["master_location"]
+    all_codes = refs["all_codes"]
+    codes_col = _codes_column(all_codes)
 
     # --- Init services
     location_finder = Location_Codes_Finder(
@@ -236,30 +270,30 @@ def run_pipeline(
         codes_list=all_codes[codes_col],
     )
 
-    # --- Combined address setup (master set)
-    master_combined_set = set(
-        my_loc.apply(
-            lambda r: location_finder.combine_addr(r.get("Loc_Address", ""), r.get("Loc_City", ""), r.get("Loc_ST", "")),
-            axis=1,
-        ).dropna()
-    )
+    # --- Combined address setup (master set): reuse the keys the finder already built
+    # get_indexer maps each address to its position in the master keys (-1 = not in master)
+    master_keys = location_finder.master_keys
 
     # --- Accrual combined addresses (canonical columns)
-    accrual_sheet["Consignor_Combined_Address"] = accrual_sheet.apply(
-        lambda r: location_finder.combine_addr(r["Origin Address"], r["Origin City"], r["Origin State"]),
-        axis=1,
+    accrual_sheet["Consignor_Combined_Address"] = combine_addr_vec(
+        accrual_sheet["Origin Address"], accrual_sheet["Origin City"], accrual_sheet["Origin State"]
     )
-    accrual_sheet["Consignee_Combined_Address"] = accrual_sheet.apply(
-        lambda r: location_finder.combine_addr(r["Destination Address"], r["Destination City"], r["Destination State"]),
-        axis=1,
+    accrual_sheet["Consignee_Combined_Address"] = combine_addr_vec(
+        accrual_sheet["Destination Address"], accrual_sheet["Destination City"], accrual_sheet["Destination State"]
     )
 
+    # Uppercased names, computed once and reused by extraction, the CINTAS/MAT check,
+    # the Mississauga rule and the exception rules
+    consignor_up = accrual_sheet["Consignor"].fillna("").astype(str).str.upper()
+    consignee_up = accrual_sheet["Consignee"].fillna("").astype(str).str.upper()
+    upper_cols = {"Consignor": consignor_up, "Consignee": consignee_up}
+
     # --- Extract codes from text (and normalize)
     accrual_sheet["Extracted Consignor Code"] = _normalize_loc_code_series(
-        accrual_sheet["Consignor"].apply(location_finder.extract_from_text)
+        location_finder.extract_from_text_series(consignor_up)
     )
     accrual_sheet["Extracted Consignee Code"] = _normalize_loc_code_series(
-        accrual_sheet["Consignee"].apply(location_finder.extract_from_text)
+        location_finder.extract_from_text_series(consignee_up)
     )
 
     # --- Address checker rule
@@ -270,15 +304,11 @@ def run_pipeline(
         accrual_sheet["Extracted Consignee Code"].astype(str).str.strip() != ""
     )
 
-    consignor_no_cintas_or_mat = ~accrual_sheet["Consignor"].fillna("").str.upper().str.contains(
-        r"\b(CINTAS|MAT)\b", regex=True
-    )
-    consignee_no_cintas_or_mat = ~accrual_sheet["Consignee"].fillna("").str.upper().str.contains(
-        r"\b(CINTAS|MAT)\b", regex=True
-    )
+    consignor_no_cintas_or_mat = ~consignor_up.str.contains(_CINTAS_RE)
+    consignee_no_cintas_or_mat = ~consignee_up.str.contains(_CINTAS_RE)
 
-    consignor_addr_ok = accrual_sheet["Consignor_Combined_Address"].fillna("").isin(master_combined_set)
-    consignee_addr_ok = accrual_sheet["Consignee_Combined_Address"].fillna("").isin(master_combined_set)
+    consignor_addr_ok = master_keys.get_indexer(accrual_sheet["Consignor_Combined_Address"].fillna("")) != -1
+    consignee_addr_ok = master_keys.get_indexer(accrual_sheet["Consignee_Combined_Address"].fillna("")) != -1
 
     wipe_consignor = consignor_has_code & consignor_no_cintas_or_mat & ~consignor_addr_ok
     wipe_consignee = consignee_has_code & consignee_no_cintas_or_mat & ~consignee_addr_ok
@@ -291,17 +321,8 @@ def run_pipeline(
     dest_type_col = _pick_col(accrual_sheet, ["Dest Type Code", "Dest Loc Code", "Destination Type Code", "DestTypeCode"])
 
     if org_type_col and dest_type_col:
-        tmp = accrual_sheet.apply(
-            lambda r: pd.Series(
-                location_finder.extract_from_org_dest_type(
-                    r.get(org_type_col, ""),
-                    r.get(dest_type_col, ""),
-                )
-            ),
-            axis=1,
-        )
-        tmp.columns = ["Org Type Consignor Code", "Dest Type Consignee Code"]
-        accrual_sheet[["Org Type Consignor Code", "Dest Type Consignee Code"]] = tmp
+        accrual_sheet["Org Type Consignor Code"] = location_finder.validate_codes_series(accrual_sheet[org_type_col])
+        accrual_sheet["Dest Type Consignee Code"] = location_finder.validate_codes_series(accrual_sheet[dest_type_col])
     else:
         accrual_sheet["Org Type Consignor Code"] = ""
         accrual_sheet["Dest Type Consignee Code"] = ""
@@ -311,44 +332,39 @@ def run_pipeline(
 
     # --- Address-Looked-Up Codes (and normalize)
     accrual_sheet["Addr_Lookup_Consignor_Code"] = _normalize_loc_code_series(
-        accrual_sheet["Consignor_Combined_Address"].apply(location_finder.extract_from_address)
+        location_finder.extract_from_address_series(accrual_sheet["Consignor_Combined_Address"])
     )
     accrual_sheet["Addr_Lookup_Consignee_Code"] = _normalize_loc_code_series(
-        accrual_sheet["Consignee_Combined_Address"].apply(location_finder.extract_from_address)
+        location_finder.extract_from_address_series(accrual_sheet["Consignee_Combined_Address"])
     )
 
     # --- Special override: Mississauga "Suite" consignee rule
     consignee_combo = accrual_sheet["Consignee_Combined_Address"].fillna("").astype(str).str.upper()
-    consignor_txt = accrual_sheet["Consignor"].fillna("").astype(str).str.upper().str.strip()
+    consignor_txt = consignor_up.str.strip()
 
-    is_suite_mississauga = consignee_combo.str.startswith("SUITEMISSISSAUGAON")
+    is_suite_mississauga = consignee_combo.str.startswith("SUITEMISSISSAUGAON").to_numpy(dtype=bool)
 
-    consignor_097H = consignor_txt.str.startswith(("LNK", "AMERICAN METAL CRAFTERS", "RADIANS", "EVER READY"))
-    consignor_067N = consignor_txt.str.startswith(("VECTAIR", "ZEP"))
-    consignor_0897 = consignor_txt.str.startswith(("CHEMFREE", "BERRY GLOBAL"))
-
-    accrual_sheet.loc[is_suite_mississauga & consignor_097H, "Addr_Lookup_Consignee_Code"] = "097H"
-    accrual_sheet.loc[is_suite_mississauga & consignor_067N, "Addr_Lookup_Consignee_Code"] = "067N"
-    accrual_sheet.loc[is_suite_mississauga & consignor_0897, "Addr_Lookup_Consignee_Code"] = "0897"
+    # One anchored prefix scan over the Suite rows; the matched prefix maps to its code
+    if is_suite_mississauga.any():
+        suite_codes = (
+            consignor_txt[is_suite_mississauga]
+            .str.extract(_MISSISSAUGA_PREFIX_RE, expand=False)
+            .map(_MISSISSAUGA_PREFIX_TO_CODE)
+        )
+        has_rule = np.zeros(len(accrual_sheet), dtype=bool)
+        has_rule[np.flatnonzero(is_suite_mississauga)] = suite_codes.notna().to_numpy(dtype=bool)
+        accrual_sheet.loc[has_rule, "Addr_Lookup_Consignee_Code"] = suite_codes.dropna().to_numpy()
 
     # --- Final location codes (precedence: extracted -> org/dest -> address -> NON-CINTAS)
-    accrual_sheet["Final Consignor Code"] = (
-        clean_blank(accrual_sheet["Extracted Consignor Code"])
-        .fillna(clean_blank(accrual_sheet["Org Type Consignor Code"]))
-        .fillna(clean_blank(accrual_sheet["Addr_Lookup_Consignor_Code"]))
-        .fillna("NON-CINTAS")
+    # Every source column is already normalized, as are the override and exception values,
+    # so the finals need no further normalization pass
+    accrual_sheet["Final Consignor Code"] = _first_nonblank_code(
+        accrual_sheet, ["Extracted Consignor Code", "Org Type Consignor Code", "Addr_Lookup_Consignor_Code"]
     )
-    accrual_sheet["Final Consignee Code"] = (
-        clean_blank(accrual_sheet["Extracted Consignee Code"])
-        .fillna(clean_blank(accrual_sheet["Dest Type Consignee Code"]))
-        .fillna(clean_blank(accrual_sheet["Addr_Lookup_Consignee_Code"]))
-        .fillna("NON-CINTAS")
+    accrual_sheet["Final Consignee Code"] = _first_nonblank_code(
+        accrual_sheet, ["Extracted Consignee Code", "Dest Type Consignee Code", "Addr_Lookup_Consignee_Code"]
     )
 
-    # Normalize finals again (important if something became '972' etc.)
-    accrual_sheet["Final Consignor Code"] = _normalize_loc_code_series(accrual_sheet["Final Consignor Code"])
-    accrual_sheet["Final Consignee Code"] = _normalize_loc_code_series(accrual_sheet["Final Consignee Code"])
-
     # =========================
     # Exceptions
     # =========================
@@ -366,33 +382,38 @@ def run_pipeline(
         {"match_column": "Consignee", "contains": "EMPRESA", "set_column": "Final Consignee Code", "value": "0972"},
     ]
 
+    # One alternation scan per match column finds the rows any rule could hit;
+    # the individual rules then only run on those rows, in their original order.
+    match_candidates = {}
+    for col in dict.fromkeys(rule["match_column"] for rule in EXCEPTION_RULES):
+        if col not in accrual_sheet.columns:
+            continue
+        upper = upper_cols.get(col)
+        if upper is None:
+            upper = accrual_sheet[col].fillna("").astype(str).str.upper()
+        pattern = "|".join(f"(?:{rule['contains']})" for rule in EXCEPTION_RULES if rule["match_column"] == col)
+        positions = np.flatnonzero(upper.str.contains(pattern, na=False).to_numpy(dtype=bool))
+        match_candidates[col] = (positions, upper.iloc[positions])
+
     for rule in EXCEPTION_RULES:
         col = rule["match_column"]
-        if col not in accrual_sheet.columns:
+        if col not in match_candidates:
             continue
-        match_series = (
-            accrual_sheet[col]
-            .fillna("")
-            .astype(str)
-            .str.upper()
-            .str.contains(rule["contains"], na=False)
-        )
+        positions, candidates = match_candidates[col]
+        hits = candidates.str.contains(rule["contains"], na=False).to_numpy(dtype=bool)
+        if not hits.any():
+            continue
+        match_series = np.zeros(len(accrual_sheet), dtype=bool)
+        match_series[positions[hits]] = True
         accrual_sheet.loc[match_series, rule["set_column"]] = rule["value"]
 
-    # Normalize again after exceptions
-    accrual_sheet["Final Consignor Code"] = _normalize_loc_code_series(accrual_sheet["Final Consignor Code"])
-    accrual_sheet["Final Consignee Code"] = _normalize_loc_code_series(accrual_sheet["Final Consignee Code"])
-
-    # --- Type code mapping (normalize reference keys!)
-    if "Loc Code" in master_loc.columns:
-        master_loc["Loc Code"] = _normalize_loc_code_series(master_loc["Loc Code"])
-
-    master_code_to_type = dict(
-        zip(
-            master_loc["Loc Code"].astype(str).str.upper(),
-            master_loc["Type Code"].astype(str).str.upper().replace("NAN", pd.NA),
-        )
-    )
+    # --- Type code mapping (master Loc Code was normalized on entry)
+    # Built straight from the arrays; "NAN"/missing type codes map to None (-> NON-CINTAS below)
+    master_types = master_loc["Type Code"].astype(str).str.upper().to_numpy(dtype=object)
+    master_code_to_type = {
+        code: (t if isinstance(t, str) and t != "NAN" else None)
+        for code, t in zip(master_loc["Loc Code"].to_numpy(dtype=object), master_types)
+    }
 
     accrual_sheet["Final Consignor Type"] = (
         accrual_sheet["Final Consignor Code"].astype(str).str.upper().map(master_code_to_type).fillna("NON-CINTAS")
@@ -400,50 +421,34 @@ def run_pipeline(
     accrual_sheet["Final Consignee Type"] = (
         accrual_sheet["Final Consignee Code"].astype(str).str.upper().map(master_code_to_type).fillna("NON-CINTAS")
     )
+    # Only a handful of type codes: categorical keeps them as small int codes for the mapper
+    accrual_sheet["Final Consignor Type"] = accrual_sheet["Final Consignor Type"].astype("category")
+    accrual_sheet["Final Consignee Type"] = accrual_sheet["Final Consignee Type"].astype("category")
 
     # --- Responsible party
     mapper = MatrixMapper()
-    accrual_sheet["Responsible Party"] = accrual_sheet.apply(mapper.determine_profit_center, axis=1)
+    accrual_sheet["Responsible Party"] = mapper.determine_profit_centers(accrual_sheet)
 
     # --- Profit/Cost center lookup (make master columns TEXT FIRST)
     ml_merge = master_loc.copy()
 
     if "ProfitCtr" in ml_merge.columns:
-        ml_merge["ProfitCtr"] = ml_merge["ProfitCtr"].fillna("").astype(str).str.strip()
+        ml_merge["ProfitCtr"] = ml_merge["ProfitCtr"].fillna("").astype(TEXT_DTYPE).str.strip()
 
     # ✅ THIS fixes your Cost Center EJ showing 312.1 instead of 312.10000
     if "Cost Center" in ml_merge.columns:
         ml_merge["Cost Center"] = _as_text_keep_zeros(ml_merge["Cost Center"], decimals=5)
-        ml_merge["Cost Center"] = _force_excel_text(ml_merge["Cost Center"])
-
-    accrual_sheet = accrual_sheet.merge(
-        ml_merge[["Loc Code", "ProfitCtr", "Cost Center"]],
-        left_on="Responsible Party",
-        right_on="Loc Code",
-        how="left",
-        suffixes=("", "_master"),
-    )
+        ml_merge["Cost Center"] = _force_excel_text(ml_merge["Cost Center"]).astype(TEXT_DTYPE)
 
-    # Rename safely
-    if "ProfitCtr" in accrual_sheet.columns:
-        accrual_sheet.rename(columns={"ProfitCtr": "Profit Center EJ"}, inplace=True)
+    # Responsible Party -> ProfitCtr / Cost Center as Series lookups (last master row wins, as for types).
+    # A merge would also duplicate accrual rows when the master repeats a Loc Code.
+    ml_merge = ml_merge[~ml_merge["Loc Code"].duplicated(keep="last")]
+    pc_map = pd.Series(ml_merge["ProfitCtr"].to_numpy(), index=ml_merge["Loc Code"].to_numpy())
+    cc_map = pd.Series(ml_merge["Cost Center"].to_numpy(), index=ml_merge["Loc Code"].to_numpy())
 
-    if "Cost Center_master" in accrual_sheet.columns:
-        accrual_sheet.rename(columns={"Cost Center_master": "Cost Center EJ"}, inplace=True)
-    elif "Cost Center" in accrual_sheet.columns and "Cost Center EJ" not in accrual_sheet.columns:
-        accrual_sheet.rename(columns={"Cost Center": "Cost Center EJ"}, inplace=True)
-
-    # ✅ Profit Center EJ text
-    accrual_sheet["Profit Center EJ"] = accrual_sheet.get(
-        "Profit Center EJ", pd.Series([""] * len(accrual_sheet))
-    ).fillna("").astype(str).str.strip()
-
-    # ✅ Cost Center EJ text + fixed decimals + force Excel text
-    accrual_sheet["Cost Center EJ"] = _as_text_keep_zeros(
-        accrual_sheet.get("Cost Center EJ", pd.Series([""] * len(accrual_sheet))),
-        decimals=5,
-    )
-    accrual_sheet["Cost Center EJ"] = _force_excel_text(accrual_sheet["Cost Center EJ"])
+    # ✅ Profit Center EJ / Cost Center EJ text (master values were made text above)
+    accrual_sheet["Profit Center EJ"] = accrual_sheet["Responsible Party"].map(pc_map).fillna("")
+    accrual_sheet["Cost Center EJ"] = accrual_sheet["Responsible Party"].map(cc_map).fillna("")
 
     # Blank if THIRD PARTY / NON-CINTAS
     rp_norm = accrual_sheet["Responsible Party"].fillna("").astype(str).str.upper().str.strip()
@@ -452,13 +457,11 @@ def run_pipeline(
     accrual_sheet.loc[mask_blank, "Cost Center EJ"] = ""
 
     # --- GL account logic (force as TEXT too)
-    accrual_sheet["Account # EJ"] = accrual_sheet.apply(
-        lambda row: 621000
-        if "G59" in str(row.get("Profit Center EJ", ""))
-        else (621000 if row.get("Final Consignee Code") == row.get("Responsible Party") else 621020),
-        axis=1,
+    is_g59 = accrual_sheet["Profit Center EJ"].astype(str).str.contains("G59", regex=False).to_numpy(dtype=bool)
+    consignee_is_responsible = (
+        accrual_sheet["Final Consignee Code"].to_numpy() == accrual_sheet["Responsible Party"].to_numpy()
     )
-    accrual_sheet["Account # EJ"] = _force_excel_text(accrual_sheet["Account # EJ"].astype(str))
+    accrual_sheet["Account # EJ"] = np.where(is_g59 | consignee_is_responsible, "621000", "621020")
 
     # --- Automation Accuracy
     if {"Profit Center", "Profit Center EJ"}.issubset(accrual_sheet.columns):
@@ -483,6 +486,7 @@ def run_pipeline(
     ]
     first_cols = [c for c in first_cols if c in accrual_sheet.columns]
     other_cols = [c for c in accrual_sheet.columns if c not in first_cols]
-    accrual_sheet = accrual_sheet[first_cols + other_cols]
+    # Plain column reorder: under Copy-on-Write this shares the existing blocks
+    accrual_sheet = accrual_sheet.reindex(columns=first_cols + other_cols)
 
     return accrual_sheet
\ No newline at end of file
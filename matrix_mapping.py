@@ -1,7 +1,18 @@
+import numpy as np
+import pandas as pd
+
 from coding_matrix import SPECIAL_TYPE_MAPPINGS, Coding_Matrix
 
 SPECIAL_CODES = {'0K35', '024P', '067N'}
 
+# Omnitrans fallback order (same as determine_profit_center)
+OMNITRANS_CANDIDATE_COLUMNS = [
+    "Extracted Consignee Code",
+    "Addr_Lookup_Consignee_Code",
+    "Dest Type Consignee Code",
+    "Final Consignor Code",
+]
+
 
 def _first_nonblank(*vals):
     for v in vals:
@@ -12,38 +23,144 @@ def _first_nonblank(*vals):
             return s
     return ""
 
+
+def _nonblank_text(series):
+    """Column-wise counterpart of the _first_nonblank check: stripped text, '' where blank."""
+    s = series.where(series.notna(), "").astype(str).str.strip()
+    return s.mask(s.str.upper().isin(["NAN", "NONE"]), "")
+
+
+def _normalized_types(series, drop_spaces=False):
+    """
+    str(v).strip().upper() per row, computed once per distinct value.
+    Type columns have a handful of values (and may be categorical), so this
+    only touches the uniques and broadcasts through the factorize codes.
+    """
+    codes, uniques = pd.factorize(series)
+    norm = [str(v).strip().upper() for v in np.asarray(uniques, dtype=object)]
+    norm.append("NAN")  # factorize code -1 (missing) -> str(nan).upper()
+    norm = np.array(norm, dtype=object)
+    if drop_spaces:
+        norm = np.array([v.replace(" ", "") for v in norm], dtype=object)
+    return norm[codes]
+
+
+def _build_matrix_df():
+    keys = list(dict.fromkeys(list(SPECIAL_TYPE_MAPPINGS) + list(Coding_Matrix)))
+    return pd.DataFrame({
+        "consignor_type": [k[0] for k in keys],
+        "consignee_type": [k[1] for k in keys],
+        "party": [SPECIAL_TYPE_MAPPINGS.get(k) for k in keys],
+        "direction": [Coding_Matrix.get(k) for k in keys],
+    })
+
 class MatrixMapper:
+    def __init__(self):
+        # (consignor type, consignee type) -> special party / ORIGIN-DESTINATION direction
+        self.matrix_df = _build_matrix_df()
+        self._matrix = self.matrix_df.set_index(["consignor_type", "consignee_type"])
+
     def determine_profit_center(self, row):
+        return self.determine_profit_center_tuple(
+            row['Final Consignor Type'],
+            row['Final Consignee Type'],
+            row['Final Consignor Code'],
+            row['Final Consignee Code'],
+            row.get("Carrier Name"),
+            *(row.get(col) for col in OMNITRANS_CANDIDATE_COLUMNS),
+        )
+
+    def determine_profit_center_tuple(self, consignor_type_raw, consignee_type_raw,
+                                      consignor_code, consignee_code,
+                                      carrier_name=None, *omnitrans_candidates):
+        """
+        determine_profit_center on positional values (e.g. from itertuples).
+        omnitrans_candidates follow OMNITRANS_CANDIDATE_COLUMNS order.
+        """
 
         # ✅ NEW OVERRIDE RULE (must be BEFORE SPECIAL_CODES check)
-        consignor_type = str(row.get("Final Consignor Type", "")).strip().upper()
+        consignor_type = str(consignor_type_raw).strip().upper()
         # handle "CA DC" vs "CADC"
-        consignee_type_norm = str(row.get("Final Consignee Type", "")).strip().upper().replace(" ", "")
+        consignee_type_norm = str(consignee_type_raw).strip().upper().replace(" ", "")
         if consignor_type == "MM" and consignee_type_norm == "CADC":
             return "037Q"
 
         # Existing conditions
-        if row['Final Consignee Code'] in SPECIAL_CODES and consignee_type_norm in ["USDC", "CADC"] and consignor_type!="LC":
-            return row['Final Consignee Code']
-        if isinstance(row.get("Carrier Name"), str) and "omnitrans" in row["Carrier Name"].lower():
-            candidate = _first_nonblank(
-                row.get("Extracted Consignee Code"),
-                row.get("Addr_Lookup_Consignee_Code"),
-                row.get("Dest Type Consignee Code"),
-                row.get("Final Consignor Code")
-            )
+        if consignee_code in SPECIAL_CODES and consignee_type_norm in ["USDC", "CADC"] and consignor_type!="LC":
+            return consignee_code
+        if isinstance(carrier_name, str) and "omnitrans" in carrier_name.lower():
+            candidate = _first_nonblank(*omnitrans_candidates)
             if candidate:
                 return candidate
             
         # Existing matrix logic
-        key = (row['Final Consignor Type'], row['Final Consignee Type'])
+        key = (consignor_type_raw, consignee_type_raw)
         if key in SPECIAL_TYPE_MAPPINGS:
             return SPECIAL_TYPE_MAPPINGS[key]
         if key in Coding_Matrix:
             direction = Coding_Matrix[key]
             if direction == "ORIGIN":
-                return row['Final Consignor Code']
+                return consignor_code
             elif direction == "DESTINATION":
-                return row['Final Consignee Code']
+                return consignee_code
+
+        return 'UNKNOWN'
+
+    def determine_profit_centers(self, df):
+        """
+        Column-wise determine_profit_center for a whole sheet.
+        Same rules and precedence, evaluated as boolean masks + one np.select.
+        """
+        consignor_type = df["Final Consignor Type"]
+        consignee_type = df["Final Consignee Type"]
+        consignor_code = df["Final Consignor Code"].to_numpy(dtype=object)
+        consignee_code = df["Final Consignee Code"].to_numpy(dtype=object)
+
+        consignor_type_norm = _normalized_types(consignor_type)
+        consignee_type_norm = _normalized_types(consignee_type, drop_spaces=True)
+
+        mm_to_cadc = (consignor_type_norm == "MM") & (consignee_type_norm == "CADC")
+        special_code = (
+            df["Final Consignee Code"].isin(SPECIAL_CODES).to_numpy(dtype=bool)
+            & np.isin(consignee_type_norm, ["USDC", "CADC"])
+            & (consignor_type_norm != "LC")
+        )
+
+        candidate = np.full(len(df), "", dtype=object)
+        omnitrans = np.zeros(len(df), dtype=bool)
+        if "Carrier Name" in df.columns:
+            omnitrans = (
+                df["Carrier Name"].astype(str).str.lower()
+                .str.contains("omnitrans", regex=False, na=False)
+                .to_numpy(dtype=bool)
+            )
+            for col in reversed(OMNITRANS_CANDIDATE_COLUMNS):
+                if col in df.columns:
+                    vals = _nonblank_text(df[col]).to_numpy(dtype=object)
+                    candidate = np.where(vals != "", vals, candidate)
+            omnitrans = omnitrans & (candidate != "")
+
+        lookup = self._matrix.reindex(pd.MultiIndex.from_arrays([consignor_type, consignee_type]))
+        party = lookup["party"].to_numpy(dtype=object)
+        direction = lookup["direction"].to_numpy(dtype=object)
 
-        return 'UNKNOWN'
\ No newline at end of file
+        result = np.select(
+            [
+                mm_to_cadc,
+                special_code,
+                omnitrans,
+                pd.notna(party),
+                direction == "ORIGIN",
+                direction == "DESTINATION",
+            ],
+            [
+                np.full(len(df), "037Q", dtype=object),
+                consignee_code,
+                candidate,
+                party,
+                consignor_code,
+                consignee_code,
+            ],
+            default="UNKNOWN",
+        )
+        return pd.Series(result, index=df.index)
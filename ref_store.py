@@ -1,6 +1,6 @@
 from __future__ import annotations
 from dataclasses import dataclass
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple
 import pandas as pd
 import streamlit as st
 from streamlit_gsheets import GSheetsConnection
@@ -127,9 +127,10 @@ def clear_pending_rows(key: Optional[str] = None) -> None:
 # ----------------------------
 # HELPERS
 # ----------------------------
-def find_codes_column(codes_df: pd.DataFrame) -> str:
+def find_codes_column_from_columns(columns: Tuple[str, ...]) -> str:
+   """Picks the codes column from a hashable tuple of column names (cache-friendly)."""
    preferred = ["Codes", "Code", "LOC_CODE", "Loc Code", "loc_code"]
    for c in preferred:
-       if c in codes_df.columns:
+       if c in columns:
            return c
-   return codes_df.columns[0]
\ No newline at end of file
+   return columns[0]
\ No newline at end of file
@@ -2,8 +2,9 @@ from __future__ import annotations
 import io
 import streamlit as st
 import pandas as pd
-from ref_store import RefSheets, load_refs, append_row, find_codes_column, get_pending_rows_df, clear_pending_rows
-from main_logic import run_pipeline, read_uploaded_to_df
+from openpyxl import load_workbook
+from ref_store import RefSheets, load_refs, append_row, find_codes_column_from_columns, get_pending_rows_df, clear_pending_rows
+from main_logic import normalize_refs, run_pipeline, read_uploaded_to_df
 from weekly_audit_builder import WeeklyAuditBuilder
 
 st.set_page_config(page_title="Logistics Financials Automation", layout="wide")
@@ -13,11 +14,13 @@ st.title("Logistics Financials Automation")
 # ----------------------------
 REF_SHEETS = RefSheets.from_env_or_defaults()
 # ----------------------------
-# Cached load refs (read-only public)
+# Cached load refs (read-only public), normalized once for run_pipeline,
+# plus their row counts for the sidebar
 # ----------------------------
 @st.cache_data(show_spinner=False)
 def cached_load_refs():
-   return load_refs(REF_SHEETS, ttl=600)
+   refs = normalize_refs(load_refs(REF_SHEETS, ttl=600))
+   return refs, {key: len(df) for key, df in refs.items()}
 
 def clear_refs_cache():
    st.cache_data.clear()
@@ -35,30 +38,56 @@ def _pick_col(df: pd.DataFrame, candidates: list[str]) -> str | None:
 def _clean_str_series(s: pd.Series) -> pd.Series:
    return s.fillna("").astype(str).str.strip()
 
+@st.cache_data(show_spinner=False, max_entries=4)
+def _parse_upload(raw: bytes, name: str) -> pd.DataFrame:
+   """Parse an upload's bytes once; reruns with the same file hit the cache."""
+   lower = (name or "").lower()
+   if lower.endswith(".txt") or lower.endswith(".csv"):
+       if b"\x00" in raw:
+           raw = raw.translate(None, b"\x00")
+   cleaned = io.BytesIO(raw)
+   cleaned.name = name
+   return read_uploaded_to_df(cleaned)
+
 def safe_read_uploaded(uploaded) -> pd.DataFrame:
    """
    Uses your existing read_uploaded_to_df(uploaded),
    but removes NULL bytes for txt/csv uploads first (fixes pandas ParserError).
    """
-   name = (uploaded.name or "").lower()
-   if name.endswith(".txt") or name.endswith(".csv"):
-       raw = uploaded.getvalue()
-       if b"\x00" in raw:
-           raw = raw.replace(b"\x00", b"")
-       cleaned = io.BytesIO(raw)
-       class _Up:
-           def __init__(self, b, name):
-               self._b = b
-               self.name = name
-           def getvalue(self):
-               return self._b.getvalue()
-       return read_uploaded_to_df(_Up(cleaned, uploaded.name))
-   return read_uploaded_to_df(uploaded)
+   return _parse_upload(uploaded.getvalue(), uploaded.name)
+
+@st.cache_data(show_spinner=False)
+def _codes_col(columns: tuple[str, ...]) -> str:
+   return find_codes_column_from_columns(columns)
+
+@st.cache_data(show_spinner=False, max_entries=2)
+def _build_summary(xlsx_bytes: bytes) -> tuple[bytes, str, int, int] | None:
+   """Edited Weekly Audit bytes -> (packed summary, run label, USD rows, CAD rows); None if a tab is missing."""
+   # sheet names only (read-only workbook index) before parsing any sheet data
+   wb = load_workbook(io.BytesIO(xlsx_bytes), read_only=True)
+   sheet_names = wb.sheetnames
+   wb.close()
+   names_lower = {s.lower(): s for s in sheet_names}
+   usd_key = names_lower.get("usd") or names_lower.get("usa")
+   cad_key = names_lower.get("cad")
+   if not (usd_key and cad_key):
+       return None
+   wanted = WeeklyAuditBuilder.INPUT_COLUMNS
+   sheets = pd.read_excel(io.BytesIO(xlsx_bytes), sheet_name=[usd_key, cad_key], usecols=lambda c: c in wanted, dtype=str)
+   usd_df, cad_df = sheets[usd_key], sheets[cad_key]
+   builder = WeeklyAuditBuilder()
+   selected_run = None
+   if "RunNumber" in usd_df.columns and len(usd_df) > 0:
+       selected_run = usd_df["RunNumber"].iloc[0]
+   usd_sheet = builder.build_currency_sheet(usd_df, "USD", selected_run)
+   cad_sheet = builder.build_currency_sheet(cad_df, "CAD", selected_run)
+   packed = builder.pack_accounting_summary(usd_sheet, cad_sheet)
+   return packed, f"{selected_run or 'auto'}", len(usd_df), len(cad_df)
 
 # ----------------------------
 # Load refs (from Google Sheets)
 # ----------------------------
-refs = cached_load_refs()
+refs, ref_counts = cached_load_refs()
 # ----------------------------
 # Sidebar: Reference Tables (overlay edits)
 # ----------------------------
@@ -95,7 +124,8 @@ with st.sidebar:
                }
                if loc_code.strip():
                    row["Loc Code"] = loc_code.strip()
-               refs = append_row(refs, "my_location", row)
+               refs = normalize_refs(append_row(refs, "my_location", row))
+               ref_counts["my_location"] += 1
                st.success("Row added to session overlay.")
            except Exception as e:
                st.error(str(e))
@@ -126,7 +156,8 @@ with st.sidebar:
                    "ProfitCtr": profit.strip(),
                    "Cost Center": cost.strip(),
                }
-               refs = append_row(refs, "master_location", row)
+               refs = normalize_refs(append_row(refs, "master_location", row))
+               ref_counts["master_location"] += 1
                st.success("Row added to session overlay.")
            except Exception as e:
                st.error(str(e))
@@ -145,11 +176,12 @@ with st.sidebar:
                st.rerun()
    with st.expander("➕ Add to Location Codes List", expanded=False):
        st.write("Used to validate/extract allowed codes.")
-       codes_col = find_codes_column(refs["all_codes"])
+       codes_col = _codes_col(tuple(refs["all_codes"].columns))
        new_code = st.text_input(f"New code ({codes_col})", value="")
        if st.button("Add code (session overlay)"):
            try:
-               refs = append_row(refs, "all_codes", {codes_col: new_code.strip()})
+               refs = normalize_refs(append_row(refs, "all_codes", {codes_col: new_code.strip()}))
+               ref_counts["all_codes"] += 1
                st.success("Code added to session overlay.")
            except Exception as e:
                st.error(str(e))
@@ -168,9 +200,9 @@ with st.sidebar:
                st.rerun()
    st.divider()
    st.subheader("Quick Peek")
-   st.write("MY LOCATION TABLE rows:", len(refs["my_location"]))
-   st.write("Master Location Table rows:", len(refs["master_location"]))
-   st.write("All Location Codes rows:", len(refs["all_codes"]))
+   st.write("MY LOCATION TABLE rows:", ref_counts["my_location"])
+   st.write("Master Location Table rows:", ref_counts["master_location"])
+   st.write("All Location Codes rows:", ref_counts["all_codes"])
    if st.button("🔄 Refresh refs from Google Sheets"):
        clear_refs_cache()
        st.success("Cache cleared — reload triggered.")
@@ -199,6 +231,7 @@ if run_main and uploaded_main is not None:
            cintas_master_data=refs["my_location"],
            cintas_master_data_2=refs["master_location"],
            cintas_location_codes=refs["all_codes"],
+           refs_normalized=True,
        )
    st.success("Done.")
    st.dataframe(out_df.head(50), use_container_width=True)
@@ -220,27 +253,16 @@ st.caption("Attach edited Weekly Audit file (must contain 'USD'/'USA' and 'CAD'
 edited_file = st.file_uploader("Drop your edited Weekly Audit file here", type=["xlsx"], key="edited_wa")
 if edited_file is not None:
    try:
-       xls = pd.ExcelFile(edited_file)
-       names_lower = {s.lower(): s for s in xls.sheet_names}
-       usd_key = names_lower.get("usd") or names_lower.get("usa")
-       cad_key = names_lower.get("cad")
-       if not (usd_key and cad_key):
+       summary = _build_summary(edited_file.getvalue())
+       if summary is None:
            st.error("Workbook must contain both 'USD' (or 'USA') and 'CAD' sheets.")
        else:
-           usd_df = pd.read_excel(xls, usd_key)
-           cad_df = pd.read_excel(xls, cad_key)
-           st.success(f"Edited workbook loaded: USD rows = {len(usd_df):,}, CAD rows = {len(cad_df):,}.")
-           builder = WeeklyAuditBuilder()
-           selected_run = None
-           if "RunNumber" in usd_df.columns and len(usd_df) > 0:
-               selected_run = usd_df["RunNumber"].iloc[0]
-           usd_sheet = builder.build_currency_sheet(usd_df, "USD", selected_run)
-           cad_sheet = builder.build_currency_sheet(cad_df, "CAD", selected_run)
-           packed = builder.pack_accounting_summary(usd_sheet, cad_sheet)
+           packed, run_label, usd_rows, cad_rows = summary
+           st.success(f"Edited workbook loaded: USD rows = {usd_rows:,}, CAD rows = {cad_rows:,}.")
            st.download_button(
                "⬇️ Download Accounting Summary (USD & CAD)",
                data=packed,
-               file_name=f"Accounting Summary (Run {selected_run or 'auto'}).xlsx",
+               file_name=f"Accounting Summary (Run {run_label}).xlsx",
                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
                help="Header = negative of Paid/Paid Amount; details = Total Paid Minus Duty and CAD Tax; Account # is text.",
            )
@@ -0,0 +1,46 @@
+import io
+import unittest
+
+import numpy as np
+import pandas as pd
+from openpyxl import load_workbook
+
+from weekly_audit_builder import WeeklyAuditBuilder
+
+
+class PackAccountingSummaryTest(unittest.TestCase):
+
+    def _sheet(self, currency):
+        edited = pd.DataFrame({
+            "RunNumber": ["463", "463", "463"],
+            "Profit Center": ["G59", "G59", "G59"],
+            "Cost Center": ["312", "312", "312"],
+            "Account #": ["621000.0", np.nan, ""],
+            "Currency": [currency] * 3,
+            "Total Paid Minus Duty and CAD Tax": ["10", "(2.5)", "4"],
+            "Paid": ["10", "2.5", "4"],
+        })
+        return WeeklyAuditBuilder().build_currency_sheet(edited, currency, "463")
+
+    def test_blank_account_rows_are_written_as_empty_text_cells(self):
+        usd, cad = self._sheet("USD"), self._sheet("CAD")
+        self.assertTrue(usd["Account #"].isna().any())
+
+        wb = load_workbook(io.BytesIO(WeeklyAuditBuilder.pack_accounting_summary(usd, cad)))
+
+        for name, df in (("USD", usd), ("CAD", cad)):
+            ws = wb[name]
+            rows = list(ws.iter_rows(values_only=True))
+            self.assertEqual(list(rows[0]), list(df.columns))
+            self.assertEqual(len(rows), len(df) + 1)
+            acct_col = df.columns.get_loc("Account #") + 1
+            for r, acct in enumerate(df["Account #"], start=2):
+                cell = ws.cell(row=r, column=acct_col)
+                self.assertEqual(cell.number_format, "@")
+                self.assertEqual(cell.value, None if pd.isna(acct) or acct == "" else str(acct))
+            amounts = [row[df.columns.get_loc("Amount")] for row in rows[1:]]
+            self.assertEqual(amounts, df["Amount"].tolist())
+
+
+if __name__ == "__main__":
+    unittest.main()
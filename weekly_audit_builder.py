@@ -1,23 +1,47 @@
 import io
 
+import numpy as np
+
 import pandas as pd
+
+import xlsxwriter
 from typing import Optional
 
 class WeeklyAuditBuilder:
 
     """Builds USD/CAD Accounting Summary tabs from edited Weekly Audit workbooks."""
 
+    # columns build_currency_sheet reads; everything else in the sheet can be skipped on load
+
+    INPUT_COLUMNS = frozenset([
+
+        "RunNumber", "Profit Center", "Cost Center", "Account #", "Currency",
+
+        "Total Paid Minus Duty and CAD Tax", "Paid", "Paid Amount",
+
+        "GST/PST Paid", "GST/PST Account #", "HST Paid", "HST Account #",
+
+        "QST Paid", "QST Account #", "Duty Paid", "Duty Account #",
+
+    ])
+
     # === helpers (no header normalization) ===
 
-    @staticmethod
+    _PAREN_TABLE = str.maketrans({"(": "-", ")": ""})
+
+    @classmethod
+
+    def _to_float(cls, series: pd.Series) -> pd.Series:
+
+        s = series.astype(str).str.translate(cls._PAREN_TABLE)
 
-    def _num(series: pd.Series) -> pd.Series:
+        return pd.to_numeric(s, errors="coerce").fillna(0.0)
 
-        s = series.astype(str)
+    @classmethod
 
-        s = s.str.replace("(", "-", regex=False).str.replace(")", "", regex=False)
+    def _num(cls, series: pd.Series) -> pd.Series:
 
-        return pd.to_numeric(s, errors="coerce").fillna(0.0).round(2)
+        return cls._to_float(series).round(2)
 
     @staticmethod
 
@@ -25,11 +49,13 @@ class WeeklyAuditBuilder:
 
         s = series.astype(str).str.strip()
 
-        s = s.str.replace(r"\.0$", "", regex=True)
+        # an all-blank column splits into an all-NaN object column that .str rejects
 
-        s = s.str.replace(r"\..*$", "", regex=True)
+        if not s.notna().any():
 
-        return s
+            return s
+
+        return s.str.split(".", n=1, regex=False).str[0]
 
     def build_currency_sheet(self, df: pd.DataFrame, force_currency: str, selected_run: Optional[str]) -> pd.DataFrame:
 
@@ -53,35 +79,43 @@ class WeeklyAuditBuilder:
 
             raise ValueError("Missing 'Paid' or 'Paid Amount' column.")
 
+        rn = df["RunNumber"].astype(str).str.strip()
+
         if selected_run:
 
-            df = df[df["RunNumber"].astype(str).str.strip() == str(selected_run).strip()]
+            keep = rn == str(selected_run).strip()
+
+            # fresh RangeIndex so the per-tax mask slicing below stays positional
+
+            df = df[keep].reset_index(drop=True)
+
+            rn = rn[keep].reset_index(drop=True)
 
             if df.empty:
 
                 raise ValueError(f"No rows found for RunNumber {selected_run}")
 
-        base = pd.DataFrame({
+        pc = df["Profit Center"].astype(str).str.strip()
 
-            "Run Number":  df["RunNumber"].astype(str).str.strip(),
+        cc = df["Cost Center"].astype(str).str.strip()
 
-            "Profit Center": df["Profit Center"].astype(str).str.strip(),
+        pcs = [pc.to_numpy()]
 
-            "Cost Center":   df["Cost Center"].astype(str).str.strip(),
+        ccs = [cc.to_numpy()]
 
-            "Account #":     self._clean_acct(df["Account #"]),
+        accts = [self._clean_acct(df["Account #"]).to_numpy()]
 
-            "Currency":      df["Currency"].astype(str).str.upper().str.strip(),
+        curs = [df["Currency"].astype(str).str.upper().str.strip().to_numpy()]
 
-            "Amount":        self._num(df["Total Paid Minus Duty and CAD Tax"]),
+        amounts = [self._num(df["Total Paid Minus Duty and CAD Tax"]).to_numpy()]
 
-        })
+        # only the total is reported, so round once after summing
 
-        header_amount = round(-self._num(df[paid_col]).sum(), 2)
+        header_amount = round(-float(self._to_float(df[paid_col]).to_numpy().sum()), 2)
 
         header = {
 
-            "Run Number": str(selected_run or (df["RunNumber"].astype(str).str.strip().iloc[0] if not df.empty else "")),
+            "Run Number": str(selected_run or (rn.iloc[0] if not df.empty else "")),
 
             "Profit Center": "686",
 
@@ -113,8 +147,6 @@ class WeeklyAuditBuilder:
 
         ]
 
-        tax_frames = []
-
         for paid_name, acct_name, default_acct in tax_specs:
 
             if paid_name in df.columns:
@@ -125,39 +157,77 @@ class WeeklyAuditBuilder:
 
                 if mask.any():
 
-                    acct_series = self._clean_acct(df[acct_name]) if acct_name in df.columns else pd.Series([""] * len(df), index=df.index)
+                    acct_arr = self._clean_acct(df[acct_name]).to_numpy(dtype=object) if acct_name in df.columns else np.full(len(df), "", dtype=object)
 
                     if default_acct is not None:
 
-                        acct_series = acct_series.where(acct_series.replace("", pd.NA).notna(), other=default_acct)
+                        acct_arr = np.where(pd.isna(acct_arr) | (acct_arr == ""), default_acct, acct_arr)
+
+                    pcs.append(pc.loc[mask].to_numpy())
+
+                    ccs.append(cc.loc[mask].to_numpy())
 
-                    tax_frames.append(pd.DataFrame({
+                    accts.append(acct_arr[mask.to_numpy()])
 
-                        "Run Number":  df.loc[mask, "RunNumber"].astype(str).str.strip(),
+                    curs.append(np.full(int(mask.sum()), force_currency, dtype=object))
 
-                        "Profit Center": df.loc[mask, "Profit Center"].astype(str).str.strip(),
+                    amounts.append(amt.loc[mask].round(2).to_numpy())
 
-                        "Cost Center":   df.loc[mask, "Cost Center"].astype(str).str.strip(),
+        combined = pd.DataFrame({
 
-                        "Account #":     self._clean_acct(acct_series.loc[mask]),
+            "Profit Center": np.concatenate(pcs),
 
-                        "Currency":      force_currency,
+            "Cost Center":   np.concatenate(ccs),
 
-                        "Amount":        amt.loc[mask].round(2),
+            "Account #":     np.concatenate(accts),
 
-                    }))
+            "Currency":      np.concatenate(curs),
+
+            "Amount":        np.concatenate(amounts),
+
+        })
 
-        combined = pd.concat([base] + tax_frames, ignore_index=True) if tax_frames else base
+        # zero lines never change a total; leave them out of the grouping and the summary
 
-        grouped = (
+        combined = combined.loc[combined["Amount"].to_numpy() != 0.0]
 
-            combined.groupby(["Profit Center","Cost Center","Account #","Currency"], dropna=False, as_index=False)["Amount"]
+        keys = ["Profit Center","Cost Center","Account #","Currency"]
 
-                    .sum()
+        # few distinct keys per sheet: fold the four category codes into one int key,
 
-        )
+        # then np.unique (sorted, like groupby) + bincount replace the hash groupby
 
-        grouped["Account #"] = self._clean_acct(grouped["Account #"])
+        cats, key_codes = [], []
+
+        for c in keys:
+
+            col = combined[c].astype("category")
+
+            codes = col.cat.codes.to_numpy().astype(np.int64)
+
+            # blanks sort after every real value, as groupby(dropna=False) puts them
+
+            codes[codes < 0] = len(col.cat.categories)
+
+            cats.append(col.cat.categories)
+
+            key_codes.append(codes)
+
+        dims = [len(cat) + 1 for cat in cats]
+
+        uniq, inv = np.unique(np.ravel_multi_index(key_codes, dims), return_inverse=True)
+
+        sums = np.bincount(inv, weights=combined["Amount"].to_numpy(dtype=float), minlength=len(uniq))
+
+        grouped = pd.DataFrame({
+
+            c: pd.Categorical.from_codes(np.where(codes == len(cat), -1, codes), categories=cat)
+
+            for c, cat, codes in zip(keys, cats, np.unravel_index(uniq, dims))
+
+        })
+
+        grouped["Amount"] = sums
 
         for c in ["Order","Bus. Area","Segment"]:
 
@@ -169,11 +239,19 @@ class WeeklyAuditBuilder:
 
         grouped["Amount"] = grouped["Amount"].round(2)
 
-        out_df = pd.concat([pd.DataFrame([header]), grouped], ignore_index=True)
+        grouped = grouped.loc[grouped["Amount"].to_numpy() != 0.0]
+
+        out_cols = ["Run Number","Profit Center","Cost Center","Order","Account #","Bus. Area","Segment","Currency","Amount"]
+
+        # header row first; one array per column keeps Amount numeric without a concat pass
 
-        out_df = out_df[["Run Number","Profit Center","Cost Center","Order","Account #","Bus. Area","Segment","Currency","Amount"]]
+        out_df = pd.DataFrame({
 
-        out_df["Account #"] = self._clean_acct(out_df["Account #"])
+            col: np.concatenate([np.asarray([header[col]]), grouped[col].to_numpy()])
+
+            for col in out_cols
+
+        })
 
         return out_df
 
@@ -185,35 +263,40 @@ class WeeklyAuditBuilder:
 
         bio = io.BytesIO()
 
-        with pd.ExcelWriter(
+        # constant_memory streams each row to a temp file as soon as the next row starts,
+
+        # so cells must be written strictly top-down: header row, then one row at a time
+
+        wb = xlsxwriter.Workbook(bio, {"constant_memory": True, "strings_to_numbers": False})
+
+        text_fmt = wb.add_format({'num_format': '@'})
 
-            bio, engine="xlsxwriter",
+        for sheet_name, df_out in {"USD": usd_df, "CAD": cad_df}.items():
 
-            engine_kwargs={"options": {"strings_to_numbers": False}}
+            ws = wb.add_worksheet(sheet_name)
 
-        ) as writer:
+            acct_idx = df_out.columns.get_loc("Account #")
 
-            usd_df.to_excel(writer, index=False, sheet_name="USD")
+            ws.set_column(acct_idx, acct_idx, None, text_fmt)
 
-            cad_df.to_excel(writer, index=False, sheet_name="CAD")
+            ws.write_row(0, 0, [str(c) for c in df_out.columns])
 
-            wb = writer.book
+            for r, row in enumerate(df_out.itertuples(index=False, name=None), start=1):
 
-            text_fmt = wb.add_format({'num_format': '@'})
+                # blanks become None so xlsxwriter leaves the cell empty, as to_excel did
 
-            for sheet_name, df_out in {"USD": usd_df, "CAD": cad_df}.items():
+                cells = [None if pd.isna(v) else v for v in row]
 
-                ws = writer.sheets[sheet_name]
+                acct = cells[acct_idx]
 
-                acct_idx = df_out.columns.get_loc("Account #")
+                ws.write_row(r, 0, cells[:acct_idx])
 
-                ws.set_column(acct_idx, acct_idx, None, text_fmt)
+                ws.write(r, acct_idx, None if acct is None else str(acct), text_fmt)
 
-                for r, val in enumerate(df_out["Account #"].astype(str).tolist(), start=1):
+                ws.write_row(r, acct_idx + 1, cells[acct_idx + 1:])
 
-                    ws.write_string(r, acct_idx, val)
+        wb.close()
 
         bio.seek(0)
 
         return bio.read()
- 
\ No newline at end of file